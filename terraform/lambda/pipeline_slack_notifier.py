@@ -1,166 +1,276 @@
 import json
 import urllib3
 import os
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Bind the serializers once at import: orjson when the optional Lambda layer
+# (slack_lambda_layers) provides it, otherwise the stdlib
+try:
+    from orjson import dumps as _dumps, loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+try:
+    import jiter  # Provided by the optional Lambda layer (slack_lambda_layers)
+except ImportError:
+    jiter = None
+
+# Lambda environment variables never change within a container, so read them once
+_WEBHOOK_URL = os.environ.get('SLACK_WEBHOOK_URL')
+_PROJECT = os.environ.get('PROJECT_NAME', 'NovaCore Vectra')
+_ENV = os.environ.get('ENVIRONMENT', 'unknown').upper()
+_USERNAME = f"{_PROJECT} CI/CD"
+_FOOTER = f"{_PROJECT} Deployment Pipeline"
+
+# Constant part of every Slack message, serialized once; only the attachments
+# are encoded per message and spliced in by _encode_message
+_MESSAGE_PREFIX = ('{"username": ' + json.dumps(_USERNAME) + ', "icon_emoji": ":rocket:", "attachments": ').encode()
+_MESSAGE_SUFFIX = b'}'
+
+# Constant handler response bodies
+_BODY_OK = json.dumps('Notification sent successfully')
+_BODY_NO_WEBHOOK = json.dumps('Slack webhook URL not configured')
+_BODY_NO_MESSAGES = json.dumps('No SNS messages to process')
+
+# Module-level so warm invocations reuse the HTTPS connection to Slack. A kept-alive
+# connection can go stale while the container is frozen, so POSTs are allowed one
+# read/protocol retry as well as connect retries: a rare duplicate Slack post is
+# better than a lost notification
+_RETRIES = urllib3.Retry(total=2, connect=2, read=1, backoff_factor=0.1, allowed_methods=None)
+_HTTP = urllib3.PoolManager(num_pools=1, maxsize=4, retries=_RETRIES)
+_HEADERS = {'Content-Type': 'application/json'}
+
+# With _RETRIES allowing at most three attempts, two of them reads, one message
+# takes at worst 2 * 5s + 2s + backoff (~12.5s). The executor matches the pool size,
+# so batches of up to 8 messages finish in two rounds (~25s), inside the 30s
+# function timeout in notifications.tf
+_TIMEOUT = urllib3.Timeout(connect=2.0, read=5.0)
+
+# Batches that need several Slack messages send them concurrently on this pool
+_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+# Attachment titles by pipeline event type (prefixed with the status emoji)
+_TITLE_MAP = {
+    'deployment_started': 'Deployment Started',
+    'deployment_completed': 'Deployment Completed',
+    'deployment_failed': 'Deployment Failed',
+    'build_started': 'Build Started',
+    'build_completed': 'Build Completed',
+    'build_failed': 'Build Failed',
+    'security_scan_completed': 'Security Scan Completed',
+    'security_scan_failed': 'Security Scan Failed',
+    'health_check_passed': 'Health Check Passed',
+    'health_check_failed': 'Health Check Failed',
+    'rollback_started': 'Rollback Started',
+    'rollback_completed': 'Rollback Completed'
+}
+
+# Attachment color, emoji and displayed status by lowercased pipeline status
+_STATUS_STYLE = {
+    'success': ('#00FF00', '✅', 'SUCCESS'),  # Green
+    'completed': ('#00FF00', '✅', 'COMPLETED'),
+    'failure': ('#FF0000', '❌', 'FAILURE'),  # Red
+    'failed': ('#FF0000', '❌', 'FAILED'),
+    'error': ('#FF0000', '❌', 'ERROR'),
+    'started': ('#FFA500', '🔄', 'STARTED'),  # Orange
+    'running': ('#FFA500', '🔄', 'RUNNING'),
+    'in_progress': ('#FFA500', '🔄', 'IN_PROGRESS')
+}
+_DEFAULT_STYLE = ('#808080', '❓')  # Gray
+
+# Event types whose attachment gets a "View Workflow" button
+_ACTION_EVENTS = frozenset(['deployment_failed', 'build_failed', 'security_scan_failed'])
+
+# Environment field is identical for every event in this container, so all
+# attachments share this one dict; it must never be mutated
+_ENV_FIELD = {"title": "Environment", "value": _ENV, "short": True}
+
+# Slack rejects messages with more than 20 attachments
+_MAX_ATTACHMENTS = 20
+
+def _post_message(body):
+    """
+    POST one encoded message to the Slack webhook
+    """
+    
+    return _HTTP.request('POST', _WEBHOOK_URL, body=body, headers=_HEADERS, timeout=_TIMEOUT)
+
+def _encode_message(attachments):
+    """
+    Serialize a Slack message carrying the given attachments
+    """
+    
+    return _MESSAGE_PREFIX + _dumps(attachments) + _MESSAGE_SUFFIX
+
+def _build_attachment(sns_message):
+    """
+    Build the Slack attachment for a single pipeline event
+    """
+    
+    # Extract pipeline event details, coercing null or non-string values
+    event_type = str(sns_message.get('event_type') or 'unknown')
+    status = str(sns_message.get('status') or 'unknown')
+    branch = str(sns_message.get('branch') or 'unknown')
+    commit_sha = str(sns_message.get('commit_sha') or 'unknown')
+    commit_message = str(sns_message.get('commit_message') or 'No commit message')
+    author = str(sns_message.get('author') or 'Unknown')
+    workflow_url = str(sns_message.get('workflow_url') or '')
+    deployment_version = str(sns_message.get('deployment_version') or '')
+    
+    # Determine color, emoji and displayed status based on status
+    style = _STATUS_STYLE.get(status.lower())
+    if style:
+        color, emoji, status_display = style
+    else:
+        color, emoji = _DEFAULT_STYLE
+        status_display = status.upper()
+    
+    # Create title based on event type
+    if event_type in _TITLE_MAP:
+        title = f"{emoji} {_TITLE_MAP[event_type]}"
+    else:
+        title = f"{emoji} Pipeline Event: {event_type}"
+    
+    # Build fields array
+    fields = [
+        _ENV_FIELD,
+        {
+            "title": "Status",
+            "value": status_display,
+            "short": True
+        },
+        {
+            "title": "Branch",
+            "value": branch,
+            "short": True
+        },
+        {
+            "title": "Commit",
+            "value": f"{commit_sha[:8]}",
+            "short": True
+        },
+        {
+            "title": "Author",
+            "value": author,
+            "short": True
+        }
+    ]
+    
+    # Add deployment version if available
+    if deployment_version:
+        fields.append({
+            "title": "Version",
+            "value": deployment_version,
+            "short": True
+        })
+    
+    # Add commit message
+    fields.append({
+        "title": "Commit Message",
+        "value": commit_message if len(commit_message) <= 100 else commit_message[:100] + "...",
+        "short": False
+    })
+    
+    attachment = {
+        "color": color,
+        "title": title,
+        "title_link": workflow_url if workflow_url else None,
+        "fields": fields,
+        "footer": _FOOTER,
+        "ts": int(time.time())
+    }
+    
+    # Add action buttons for certain events
+    if event_type in _ACTION_EVENTS:
+        attachment["actions"] = [
+            {
+                "type": "button",
+                "text": "View Workflow",
+                "url": workflow_url,
+                "style": "primary"
+            }
+        ]
+    
+    return attachment
 
 def handler(event, context):
     """
     Lambda function to send pipeline event notifications to Slack
     """
     
-    # Get environment variables
-    webhook_url = os.environ.get('SLACK_WEBHOOK_URL')
-    project_name = os.environ.get('PROJECT_NAME', 'NovaCore Vectra')
-    environment = os.environ.get('ENVIRONMENT', 'unknown')
-    
-    if not webhook_url:
+    if not _WEBHOOK_URL:
         print("ERROR: SLACK_WEBHOOK_URL environment variable not set")
         return {
             'statusCode': 400,
-            'body': json.dumps('Slack webhook URL not configured')
+            'body': _BODY_NO_WEBHOOK
         }
     
+    # Parse every SNS record in the batch, skipping malformed ones
+    event_types = []
+    attachments = []
+    for record in event.get('Records') or []:
+        if not isinstance(record, dict) or not isinstance(record.get('Sns'), dict):
+            print("Skipping malformed SNS record")
+            continue
+        raw_message = record['Sns'].get('Message')
+        if not isinstance(raw_message, str):
+            print("Skipping SNS record without a message")
+            continue
+        try:
+            if jiter:
+                sns_message = jiter.from_json(raw_message.encode(), cache_mode='keys')
+            else:
+                sns_message = _loads(raw_message)
+        except ValueError as e:
+            print(f"Skipping SNS record with invalid JSON message: {str(e)}")
+            continue
+        if not isinstance(sns_message, dict):
+            print("Skipping SNS record whose message is not a JSON object")
+            continue
+        event_types.append(str(sns_message.get('event_type') or 'unknown'))
+        attachments.append(_build_attachment(sns_message))
+    
+    if not attachments:
+        print("ERROR: No valid SNS messages in event")
+        return {
+            'statusCode': 400,
+            'body': _BODY_NO_MESSAGES
+        }
+    
+    # Group up to _MAX_ATTACHMENTS events per Slack message
+    bodies = [
+        _encode_message(attachments[start:start + _MAX_ATTACHMENTS])
+        for start in range(0, len(attachments), _MAX_ATTACHMENTS)
+    ]
+    
+    # Send a single message inline and larger batches concurrently; either way
+    # every POST completes before the handler returns and Lambda freezes the container
     try:
-        # Parse SNS message
-        sns_message = json.loads(event['Records'][0]['Sns']['Message'])
-        
-        # Extract pipeline event details
-        event_type = sns_message.get('event_type', 'unknown')
-        status = sns_message.get('status', 'unknown')
-        branch = sns_message.get('branch', 'unknown')
-        commit_sha = sns_message.get('commit_sha', 'unknown')
-        commit_message = sns_message.get('commit_message', 'No commit message')
-        author = sns_message.get('author', 'Unknown')
-        workflow_url = sns_message.get('workflow_url', '')
-        deployment_version = sns_message.get('deployment_version', '')
-        
-        # Determine color and emoji based on status
-        if status.lower() in ['success', 'completed']:
-            color = '#00FF00'  # Green
-            emoji = '✅'
-        elif status.lower() in ['failure', 'failed', 'error']:
-            color = '#FF0000'  # Red
-            emoji = '❌'
-        elif status.lower() in ['started', 'running', 'in_progress']:
-            color = '#FFA500'  # Orange
-            emoji = '🔄'
+        if len(bodies) == 1:
+            responses = [_post_message(bodies[0])]
         else:
-            color = '#808080'  # Gray
-            emoji = '❓'
-        
-        # Create title based on event type
-        title_map = {
-            'deployment_started': f"{emoji} Deployment Started",
-            'deployment_completed': f"{emoji} Deployment Completed",
-            'deployment_failed': f"{emoji} Deployment Failed",
-            'build_started': f"{emoji} Build Started",
-            'build_completed': f"{emoji} Build Completed",
-            'build_failed': f"{emoji} Build Failed",
-            'security_scan_completed': f"{emoji} Security Scan Completed",
-            'security_scan_failed': f"{emoji} Security Scan Failed",
-            'health_check_passed': f"{emoji} Health Check Passed",
-            'health_check_failed': f"{emoji} Health Check Failed",
-            'rollback_started': f"{emoji} Rollback Started",
-            'rollback_completed': f"{emoji} Rollback Completed"
-        }
-        title = title_map.get(event_type, f"{emoji} Pipeline Event: {event_type}")
-        
-        # Build fields array
-        fields = [
-            {
-                "title": "Environment",
-                "value": environment.upper(),
-                "short": True
-            },
-            {
-                "title": "Status",
-                "value": status.upper(),
-                "short": True
-            },
-            {
-                "title": "Branch",
-                "value": branch,
-                "short": True
-            },
-            {
-                "title": "Commit",
-                "value": f"{commit_sha[:8]}",
-                "short": True
-            },
-            {
-                "title": "Author",
-                "value": author,
-                "short": True
-            }
-        ]
-        
-        # Add deployment version if available
-        if deployment_version:
-            fields.append({
-                "title": "Version",
-                "value": deployment_version,
-                "short": True
-            })
-        
-        # Add commit message
-        fields.append({
-            "title": "Commit Message",
-            "value": commit_message[:100] + ("..." if len(commit_message) > 100 else ""),
-            "short": False
-        })
-        
-        # Create Slack message
-        slack_message = {
-            "username": f"{project_name} CI/CD",
-            "icon_emoji": ":rocket:",
-            "attachments": [
-                {
-                    "color": color,
-                    "title": title,
-                    "title_link": workflow_url if workflow_url else None,
-                    "fields": fields,
-                    "footer": f"{project_name} Deployment Pipeline",
-                    "ts": int(datetime.utcnow().timestamp())
-                }
-            ]
+            responses = list(_EXECUTOR.map(_post_message, bodies))
+    except urllib3.exceptions.HTTPError as e:
+        print(f"Error sending Slack notification: {str(e)}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps(f'Error: {str(e)}')
         }
-        
-        # Add action buttons for certain events
-        if event_type in ['deployment_failed', 'build_failed', 'security_scan_failed']:
-            slack_message["attachments"][0]["actions"] = [
-                {
-                    "type": "button",
-                    "text": "View Workflow",
-                    "url": workflow_url,
-                    "style": "primary"
-                }
-            ]
-        
-        # Send to Slack
-        http = urllib3.PoolManager()
-        response = http.request(
-            'POST',
-            webhook_url,
-            body=json.dumps(slack_message),
-            headers={'Content-Type': 'application/json'}
-        )
-        
-        if response.status == 200:
-            print(f"Successfully sent Slack notification for pipeline event: {event_type}")
-            return {
-                'statusCode': 200,
-                'body': json.dumps('Notification sent successfully')
-            }
-        else:
+    
+    for response in responses:
+        if response.status != 200:
             print(f"Failed to send Slack notification. Status: {response.status}")
             return {
                 'statusCode': response.status,
                 'body': json.dumps(f'Failed to send notification: {response.data}')
             }
-            
-    except Exception as e:
-        print(f"Error processing pipeline event notification: {str(e)}")
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f'Error: {str(e)}')
-        }
\ No newline at end of file
+    
+    print(f"Successfully sent Slack notification for pipeline event: {', '.join(event_types)}")
+    return {
+        'statusCode': 200,
+        'body': _BODY_OK
+    }
\ No newline at end of file
@@ -1,119 +1,192 @@
 import json
 import urllib3
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+# Bind the serializers once at import: orjson when the optional Lambda layer
+# (slack_lambda_layers) provides it, otherwise the stdlib
+try:
+    from orjson import dumps as _dumps, loads as _loads
+except ImportError:
+    from json import loads as _loads
+
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+try:
+    import jiter  # Provided by the optional Lambda layer (slack_lambda_layers)
+except ImportError:
+    jiter = None
+
+# Lambda environment variables never change within a container, so read them once
+_WEBHOOK_URL = os.environ.get('SLACK_WEBHOOK_URL')
+_PROJECT = os.environ.get('PROJECT_NAME', 'NovaCore Vectra')
+_ENV = os.environ.get('ENVIRONMENT', 'unknown').upper()
+_USERNAME = f"{_PROJECT} Monitoring"
+_FOOTER = f"{_PROJECT} AWS Infrastructure"
+
+# Constant part of every Slack message, serialized once; only the attachments
+# are encoded per message and spliced in by _encode_message
+_MESSAGE_PREFIX = ('{"username": ' + json.dumps(_USERNAME) + ', "icon_emoji": ":warning:", "attachments": ').encode()
+_MESSAGE_SUFFIX = b'}'
+
+# Constant handler response bodies
+_BODY_OK = json.dumps('Notification sent successfully')
+_BODY_NO_WEBHOOK = json.dumps('Slack webhook URL not configured')
+_BODY_NO_MESSAGES = json.dumps('No SNS messages to process')
+
+# Module-level so warm invocations reuse the HTTPS connection to Slack. A kept-alive
+# connection can go stale while the container is frozen, so POSTs are allowed one
+# read/protocol retry as well as connect retries: a rare duplicate Slack post is
+# better than a lost notification
+_RETRIES = urllib3.Retry(total=2, connect=2, read=1, backoff_factor=0.1, allowed_methods=None)
+_HTTP = urllib3.PoolManager(num_pools=1, maxsize=4, retries=_RETRIES)
+_HEADERS = {'Content-Type': 'application/json'}
+
+# With _RETRIES allowing at most three attempts, two of them reads, one message
+# takes at worst 2 * 5s + 2s + backoff (~12.5s). The executor matches the pool size,
+# so batches of up to 8 messages finish in two rounds (~25s), inside the 30s
+# function timeout in notifications.tf
+_TIMEOUT = urllib3.Timeout(connect=2.0, read=5.0)
+
+# Batches that need several Slack messages send them concurrently on this pool
+_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+# Attachment color and title emoji by alarm state
+_STATE_STYLE = {
+    'ALARM': ('#FF0000', '🚨'),  # Red
+    'OK': ('#00FF00', '✅'),  # Green
+    'INSUFFICIENT_DATA': ('#FFA500', '⚠️')  # Orange
+}
+_DEFAULT_STATE_STYLE = ('#808080', '❓')  # Gray
+
+# Slack rejects messages with more than 20 attachments
+_MAX_ATTACHMENTS = 20
+
+# Environment field is identical for every alarm in this container, so all
+# attachments share this one dict; it must never be mutated
+_ENV_FIELD = {"title": "Environment", "value": _ENV, "short": True}
+
+def _post_message(body):
+    """
+    POST one encoded message to the Slack webhook
+    """
+    
+    return _HTTP.request('POST', _WEBHOOK_URL, body=body, headers=_HEADERS, timeout=_TIMEOUT)
+
+def _encode_message(attachments):
+    """
+    Serialize a Slack message carrying the given attachments
+    """
+    
+    return _MESSAGE_PREFIX + _dumps(attachments) + _MESSAGE_SUFFIX
+
+def _build_attachment(sns_message):
+    """
+    Build the Slack attachment for a single CloudWatch alarm
+    """
+    
+    # Extract alarm details, coercing null or non-string values
+    alarm_name = str(sns_message.get('AlarmName') or 'Unknown Alarm')
+    alarm_description = str(sns_message.get('AlarmDescription') or 'No description')
+    new_state = str(sns_message.get('NewStateValue') or 'UNKNOWN')
+    old_state = str(sns_message.get('OldStateValue') or 'UNKNOWN')
+    reason = str(sns_message.get('NewStateReason') or 'No reason provided')
+    timestamp = str(sns_message.get('StateChangeTime') or datetime.utcnow().isoformat())
+    
+    # Determine color and emoji based on alarm state
+    color, emoji = _STATE_STYLE.get(new_state, _DEFAULT_STATE_STYLE)
+    
+    return {
+        "color": color,
+        "title": f"{emoji} CloudWatch Alarm: {alarm_name}",
+        "fields": [
+            _ENV_FIELD,
+            {"title": "State Change", "value": f"{old_state} → {new_state}", "short": True},
+            {"title": "Description", "value": alarm_description, "short": False},
+            {"title": "Reason", "value": reason, "short": False},
+            {"title": "Timestamp", "value": timestamp, "short": True}
+        ],
+        "footer": _FOOTER,
+        "ts": int(time.time())
+    }
+
 def handler(event, context):
     """
     Lambda function to send CloudWatch alarm notifications to Slack
     """
     
-    # Get environment variables
-    webhook_url = os.environ.get('SLACK_WEBHOOK_URL')
-    project_name = os.environ.get('PROJECT_NAME', 'NovaCore Vectra')
-    environment = os.environ.get('ENVIRONMENT', 'unknown')
-    
-    if not webhook_url:
+    if not _WEBHOOK_URL:
         print("ERROR: SLACK_WEBHOOK_URL environment variable not set")
         return {
             'statusCode': 400,
-            'body': json.dumps('Slack webhook URL not configured')
+            'body': _BODY_NO_WEBHOOK
         }
     
-    try:
-        # Parse SNS message
-        sns_message = json.loads(event['Records'][0]['Sns']['Message'])
-        
-        # Extract alarm details
-        alarm_name = sns_message.get('AlarmName', 'Unknown Alarm')
-        alarm_description = sns_message.get('AlarmDescription', 'No description')
-        new_state = sns_message.get('NewStateValue', 'UNKNOWN')
-        old_state = sns_message.get('OldStateValue', 'UNKNOWN')
-        reason = sns_message.get('NewStateReason', 'No reason provided')
-        timestamp = sns_message.get('StateChangeTime', datetime.utcnow().isoformat())
-        
-        # Determine color based on alarm state
-        color_map = {
-            'ALARM': '#FF0000',      # Red
-            'OK': '#00FF00',         # Green
-            'INSUFFICIENT_DATA': '#FFA500'  # Orange
-        }
-        color = color_map.get(new_state, '#808080')  # Default gray
-        
-        # Determine emoji based on alarm state
-        emoji_map = {
-            'ALARM': '🚨',
-            'OK': '✅',
-            'INSUFFICIENT_DATA': '⚠️'
-        }
-        emoji = emoji_map.get(new_state, '❓')
-        
-        # Create Slack message
-        slack_message = {
-            "username": f"{project_name} Monitoring",
-            "icon_emoji": ":warning:",
-            "attachments": [
-                {
-                    "color": color,
-                    "title": f"{emoji} CloudWatch Alarm: {alarm_name}",
-                    "fields": [
-                        {
-                            "title": "Environment",
-                            "value": environment.upper(),
-                            "short": True
-                        },
-                        {
-                            "title": "State Change",
-                            "value": f"{old_state} → {new_state}",
-                            "short": True
-                        },
-                        {
-                            "title": "Description",
-                            "value": alarm_description,
-                            "short": False
-                        },
-                        {
-                            "title": "Reason",
-                            "value": reason,
-                            "short": False
-                        },
-                        {
-                            "title": "Timestamp",
-                            "value": timestamp,
-                            "short": True
-                        }
-                    ],
-                    "footer": f"{project_name} AWS Infrastructure",
-                    "ts": int(datetime.utcnow().timestamp())
-                }
-            ]
+    # Parse every SNS record in the batch, skipping malformed ones
+    alarm_names = []
+    attachments = []
+    for record in event.get('Records') or []:
+        if not isinstance(record, dict) or not isinstance(record.get('Sns'), dict):
+            print("Skipping malformed SNS record")
+            continue
+        raw_message = record['Sns'].get('Message')
+        if not isinstance(raw_message, str):
+            print("Skipping SNS record without a message")
+            continue
+        try:
+            if jiter:
+                sns_message = jiter.from_json(raw_message.encode())
+            else:
+                sns_message = _loads(raw_message)
+        except ValueError as e:
+            print(f"Skipping SNS record with invalid JSON message: {str(e)}")
+            continue
+        if not isinstance(sns_message, dict):
+            print("Skipping SNS record whose message is not a JSON object")
+            continue
+        alarm_names.append(str(sns_message.get('AlarmName') or 'Unknown Alarm'))
+        attachments.append(_build_attachment(sns_message))
+    
+    if not attachments:
+        print("ERROR: No valid SNS messages in event")
+        return {
+            'statusCode': 400,
+            'body': _BODY_NO_MESSAGES
         }
-        
-        # Send to Slack
-        http = urllib3.PoolManager()
-        response = http.request(
-            'POST',
-            webhook_url,
-            body=json.dumps(slack_message),
-            headers={'Content-Type': 'application/json'}
-        )
-        
-        if response.status == 200:
-            print(f"Successfully sent Slack notification for alarm: {alarm_name}")
-            return {
-                'statusCode': 200,
-                'body': json.dumps('Notification sent successfully')
-            }
+    
+    # Group up to _MAX_ATTACHMENTS alarms per Slack message
+    bodies = [
+        _encode_message(attachments[start:start + _MAX_ATTACHMENTS])
+        for start in range(0, len(attachments), _MAX_ATTACHMENTS)
+    ]
+    
+    # Send a single message inline and larger batches concurrently; either way
+    # every POST completes before the handler returns and Lambda freezes the container
+    try:
+        if len(bodies) == 1:
+            responses = [_post_message(bodies[0])]
         else:
+            responses = list(_EXECUTOR.map(_post_message, bodies))
+    except urllib3.exceptions.HTTPError as e:
+        print(f"Error sending Slack notification: {str(e)}")
+        return {
+            'statusCode': 500,
+            'body': json.dumps(f'Error: {str(e)}')
+        }
+    
+    for response in responses:
+        if response.status != 200:
             print(f"Failed to send Slack notification. Status: {response.status}")
             return {
                 'statusCode': response.status,
                 'body': json.dumps(f'Failed to send notification: {response.data}')
             }
-            
-    except Exception as e:
-        print(f"Error processing CloudWatch alarm notification: {str(e)}")
-        return {
-            'statusCode': 500,
-            'body': json.dumps(f'Error: {str(e)}')
-        }
\ No newline at end of file
+    
+    print(f"Successfully sent Slack notification for alarm: {', '.join(alarm_names)}")
+    return {
+        'statusCode': 200,
+        'body': _BODY_OK
+    }
\ No newline at end of file
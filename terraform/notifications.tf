@@ -67,6 +67,7 @@ resource "aws_lambda_function" "slack_notifier" {
   handler       = "index.handler"
   runtime       = "python3.12"
   timeout       = 30
+  layers        = var.slack_lambda_layers
 
   environment {
     variables = {
@@ -170,6 +171,7 @@ resource "aws_lambda_function" "pipeline_slack_notifier" {
   handler       = "index.handler"
   runtime       = "python3.12"
   timeout       = 30
+  layers        = var.slack_lambda_layers
 
   environment {
     variables = {
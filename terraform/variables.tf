@@ -56,4 +56,10 @@ variable "slack_webhook_url" {
   type        = string
   default     = ""
   sensitive   = true
-}
\ No newline at end of file
+}
+
+variable "slack_lambda_layers" {
+  description = "Lambda layer ARNs for the Slack notifiers (e.g. a layer providing orjson and jiter)"
+  type        = list(string)
+  default     = []
+}